@@ -10,16 +10,156 @@ Este script implementa um jogo da velha completo com os seguintes recursos:
 - Placar de estatísticas por partida.
 - Efeitos sonoros, persistência de histórico, escolha de símbolo e mais melhorias.
 """
+import os
 import sys
 import random
 import json
+import pickle
+from functools import lru_cache
 from pathlib import Path
 from PyQt5.QtWidgets import (QApplication, QWidget, QPushButton, QVBoxLayout,
                              QLabel, QGridLayout, QMessageBox, QMainWindow,
-                             QComboBox, QStackedWidget, QLineEdit, QGraphicsOpacityEffect,
-                             QSpacerItem, QSizePolicy)
+                             QComboBox, QStackedWidget, QLineEdit, QGraphicsOpacityEffect)
 from PyQt5.QtGui import QFont, QPainter, QColor, QPen
-from PyQt5.QtCore import Qt, QTimer, QPropertyAnimation, QEasingCurve, QRect
+from PyQt5.QtCore import (Qt, QTimer, QPropertyAnimation, QEasingCurve,
+                          QObject, QRunnable, QThreadPool, pyqtSignal)
+
+# Diretório do script: temas, estatísticas e a tabela de jogadas ficam ao lado dele.
+MODULE_DIR = Path(__file__).parent
+
+
+# Máscaras das 8 linhas vencedoras. A casa (i, j) corresponde ao bit i*3+j.
+WIN_MASKS = (0b111000000, 0b000111000, 0b000000111,
+             0b100100100, 0b010010010, 0b001001001,
+             0b100010001, 0b001010100)
+FULL_MASK = 0x1FF
+INF = float('inf')
+# Ordem de exploração das casas: centro, cantos e depois bordas (melhora a poda Alfa-Beta).
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+# Casas vazias de cada máscara de ocupação, já em MOVE_ORDER: 512 tuplas montadas uma vez só.
+JOGADAS_LIVRES = tuple(tuple(bit for bit in MOVE_ORDER if not ocupadas & (1 << bit))
+                       for ocupadas in range(FULL_MASK + 1))
+# Cantos vazios de cada máscara de ocupação, como JOGADAS_LIVRES.
+CANTOS_LIVRES = tuple(tuple(bit for bit in (0, 2, 6, 8) if not ocupadas & (1 << bit))
+                      for ocupadas in range(FULL_MASK + 1))
+
+# Tipos de entrada da tabela de transposição do minimax.
+TT_EXACT, TT_LOWER, TT_UPPER = range(3)
+
+# Jogada ótima para cada estado alcançável, na forma canônica (ver canonical()):
+# (x_mask, o_mask, lado_a_jogar) -> bit. Preenchida na inicialização do app ou, se
+# importado, na primeira jogada Impossível.
+PERFECT_PLAY_FILE = "perfect_play.pkl"
+PERFECT_PLAY_PATH = MODULE_DIR / PERFECT_PLAY_FILE
+# Versão do formato gravado em disco; arquivos de outra versão são reconstruídos.
+PERFECT_PLAY_FORMATO = 2
+PERFECT_PLAY = {}
+
+# Aberturas conhecidas, para não precisar carregar a tabela na primeira jogada:
+# tabuleiro vazio -> centro; centro -> canto; canto ou borda -> centro.
+OPENING_BOOK = {
+    (0, 0, 'X'): 4,
+    (1 << 4, 0, 'O'): 0,
+    **{(1 << bit, 0, 'O'): 4 for bit in (0, 1, 2, 3, 5, 6, 7, 8)},
+}
+
+
+def xy_to_bit(x, y):
+    """Converte a posição (x, y) no índice do bit correspondente."""
+    return x * 3 + y
+
+
+def bit_to_xy(bit):
+    """Converte o índice de um bit na posição (x, y) correspondente."""
+    return divmod(bit, 3)
+
+
+def _evaluate_py(x_mask, o_mask):
+    """
+    Avalia um estado do tabuleiro representado por duas máscaras de bits.
+
+    Retorna:
+        tuple: (str, int) com o vencedor/empate e a máscara da linha da vitória, ou (None, 0).
+    """
+    for w in WIN_MASKS:
+        if (x_mask & w) == w:
+            return 'X', w
+        if (o_mask & w) == w:
+            return 'O', w
+    if (x_mask | o_mask) == FULL_MASK:
+        return "Empate", 0
+    return None, 0
+
+
+# Versão em Cython de `evaluate`, se velha_evaluate.pyx tiver sido compilado antes
+# (ver README). Nada é compilado aqui, para não atrasar a abertura do jogo. No PyPy
+# a versão em Python é compilada pelo próprio JIT, e uma extensão C só acrescentaria
+# o custo da camada de compatibilidade (cpyext) a cada chamada.
+_evaluate_c = None
+if sys.implementation.name != 'pypy':
+    try:
+        from velha_evaluate import evaluate as _evaluate_c
+    except ImportError:  # Extensão não compilada: fica a versão em Python acima.
+        pass
+
+evaluate = _evaluate_c or _evaluate_py
+
+
+def _iter_bits(mask):
+    """Itera sobre os índices dos bits ligados de `mask`, do menor para o maior."""
+    while mask:
+        b = mask & -mask
+        yield b.bit_length() - 1
+        mask ^= b
+
+
+# Linhas vencedoras que passam por cada casa (de 2 a 4), indexadas pelo bit da casa.
+LINES_THROUGH = tuple(tuple(w for w in WIN_MASKS if w >> bit & 1) for bit in range(9))
+
+
+def _completa_linha(mask, bit):
+    """Indica se `mask` tem completa alguma das linhas que passam pela casa `bit`."""
+    return any((mask & w) == w for w in LINES_THROUGH[bit])
+
+
+# Coordenadas (x, y) de cada linha vencedora, em ordem, indexadas pela máscara (0: nenhuma).
+WIN_LINES = {mask: tuple(bit_to_xy(bit) for bit in _iter_bits(mask)) for mask in WIN_MASKS}
+WIN_LINES[0] = ()
+
+
+def _gerar_simetrias():
+    """Gera as 8 simetrias do tabuleiro (4 rotações, com e sem espelho) como permutações de bits."""
+    simetrias = []
+    for espelhar in (False, True):
+        for rotacoes in range(4):
+            perm = []
+            for bit in range(9):
+                i, j = bit_to_xy(bit)
+                if espelhar:
+                    j = 2 - j
+                for _ in range(rotacoes):
+                    i, j = j, 2 - i
+                perm.append(xy_to_bit(i, j))
+            simetrias.append(tuple(perm))
+    return tuple(simetrias)
+
+
+# SYM_PERMS[t][bit] é a imagem de `bit` pela simetria t; SYM_INV desfaz a permutação.
+# SYM_TABLES[t][mask] é a imagem de uma máscara inteira, pré-calculada para as 512 possíveis.
+SYM_PERMS = _gerar_simetrias()
+SYM_INV = tuple(tuple(perm.index(bit) for bit in range(9)) for perm in SYM_PERMS)
+SYM_TABLES = tuple(tuple(sum(1 << perm[bit] for bit in _iter_bits(mask)) for mask in range(512))
+                   for perm in SYM_PERMS)
+
+
+def canonical(x_mask, o_mask):
+    """
+    Reduz um estado à sua forma canônica: a menor das 8 imagens simétricas.
+
+    Retorna:
+        tuple: (int, int, int) com as máscaras canônicas e o índice da simetria usada.
+    """
+    return min((tabela[x_mask], tabela[o_mask], t) for t, tabela in enumerate(SYM_TABLES))
 
 
 class TicTacToeLogic:
@@ -28,7 +168,7 @@ class TicTacToeLogic:
 
     Atributos:
         FACIL, MEDIO, IMPOSSIVEL (str): Constantes para os níveis de dificuldade.
-        tabuleiro (list): Representação 3x3 do tabuleiro.
+        x_mask, o_mask (int): Máscaras de 9 bits com as casas ocupadas por 'X' e 'O'.
         jogador_atual (str): 'X' ou 'O'.
         vencedor (str): 'X', 'O', 'Empate', ou None.
         player_names (dict): Mapeia 'X' e 'O' para os nomes dos jogadores.
@@ -41,13 +181,21 @@ class TicTacToeLogic:
         """Inicializa a lógica do jogo."""
         self.reset_board()
         self.player_names = {'X': 'Jogador 1', 'O': 'Jogador 2'}
+        # Os valores só dependem da posição, então a tabela vale entre partidas.
+        self._tt = {}
 
     def reset_board(self):
         """Reseta o tabuleiro para o estado inicial."""
-        self.tabuleiro = [[' '] * 3 for _ in range(3)]
+        self.x_mask = 0
+        self.o_mask = 0
         self.jogador_atual = 'X' # X sempre começa
         self.vencedor = None
 
+    def celula(self, x, y):
+        """Retorna o conteúdo da posição (x, y) como inteiro: 0 (vazia), 1 ('X') ou 2 ('O')."""
+        bit = xy_to_bit(x, y)
+        return (self.x_mask >> bit & 1) | (self.o_mask >> bit & 1) << 1
+
     def set_player_names(self, name_x, name_o):
         """Define os nomes dos jogadores."""
         self.player_names['X'] = name_x if name_x else 'Jogador X'
@@ -55,10 +203,18 @@ class TicTacToeLogic:
 
     def fazer_jogada(self, x, y):
         """Tenta fazer uma jogada na posição (x, y)."""
-        if self.tabuleiro[x][y] == ' ':
-            self.tabuleiro[x][y] = self.jogador_atual
-            return True
-        return False
+        bit = 1 << xy_to_bit(x, y)
+        if (self.x_mask | self.o_mask) & bit:
+            return False
+        if self.jogador_atual == 'X':
+            self.x_mask |= bit
+        else:
+            self.o_mask |= bit
+        return True
+
+    def casa_vazia(self, x, y):
+        """Indica se a posição (x, y) está livre."""
+        return not (self.x_mask | self.o_mask) >> xy_to_bit(x, y) & 1
 
     def alternar_jogador(self):
         """Alterna o jogador atual."""
@@ -69,40 +225,13 @@ class TicTacToeLogic:
         Verifica se o jogo terminou (vitória ou empate) e atualiza o estado.
 
         Retorna:
-            tuple: (bool, list) indicando se o jogo acabou e a linha vencedora.
+            tuple: (bool, tuple) indicando se o jogo acabou e as casas da linha vencedora.
         """
-        resultado, linha_vencedora = self._avaliar_tabuleiro(self.tabuleiro)
+        resultado, win_mask = evaluate(self.x_mask, self.o_mask)
         if resultado:
             self.vencedor = resultado
-            return True, linha_vencedora
-        return False, []
-
-    @staticmethod
-    def _avaliar_tabuleiro(tabuleiro):
-        """
-        Método estático para avaliar um estado de tabuleiro sem modificar a instância.
-
-        Retorna:
-            tuple: (str, list) com o vencedor/empate e a linha da vitória, ou (None, []).
-        """
-        # Checar linhas e colunas
-        for i in range(3):
-            if tabuleiro[i][0] == tabuleiro[i][1] == tabuleiro[i][2] != ' ':
-                return tabuleiro[i][0], [(i, 0), (i, 1), (i, 2)]
-            if tabuleiro[0][i] == tabuleiro[1][i] == tabuleiro[2][i] != ' ':
-                return tabuleiro[0][i], [(0, i), (1, i), (2, i)]
-
-        # Checar diagonais
-        if tabuleiro[0][0] == tabuleiro[1][1] == tabuleiro[2][2] != ' ':
-            return tabuleiro[0][0], [(0, 0), (1, 1), (2, 2)]
-        if tabuleiro[0][2] == tabuleiro[1][1] == tabuleiro[2][0] != ' ':
-            return tabuleiro[0][2], [(0, 2), (1, 1), (2, 0)]
-
-        # Checar empate
-        if all(tabuleiro[i][j] != ' ' for i in range(3) for j in range(3)):
-            return "Empate", []
-
-        return None, []
+            return True, WIN_LINES[win_mask]
+        return False, ()
 
     def estrategia_cpu(self, dificuldade, cpu_symbol):
         """Escolhe a melhor jogada para a CPU com base na dificuldade."""
@@ -112,67 +241,87 @@ class TicTacToeLogic:
         if dificuldade == self.MEDIO:
             return self.jogada_media(cpu_symbol, player_symbol)
         if dificuldade == self.IMPOSSIVEL:
-            is_maximizing = cpu_symbol == 'O' # 'O' é tradicionalmente o maximizador
-            _, jogada = self.minimax_alfa_beta(self.tabuleiro, is_maximizing, cpu_symbol, player_symbol)
-            return jogada
+            bit = OPENING_BOOK.get((self.x_mask, self.o_mask, cpu_symbol))
+            if bit is not None:
+                return bit_to_xy(bit)
+            _carregar_perfect_play()
+            canon_x, canon_o, simetria = canonical(self.x_mask, self.o_mask)
+            bit = PERFECT_PLAY.get((canon_x, canon_o, cpu_symbol))
+            return bit_to_xy(SYM_INV[simetria][bit]) if bit is not None else None
         return None
 
     def jogada_aleatoria(self):
         """Retorna uma jogada aleatória válida."""
-        jogadas_possiveis = [(i, j) for i in range(3) for j in range(3) if self.tabuleiro[i][j] == ' ']
-        return random.choice(jogadas_possiveis) if jogadas_possiveis else None
+        jogadas_possiveis = self._jogadas_possiveis()
+        return bit_to_xy(random.choice(jogadas_possiveis)) if jogadas_possiveis else None
 
     def jogada_media(self, cpu_symbol, player_symbol):
         """Retorna uma jogada com base em uma estratégia intermediária."""
         # 1. Tenta ganhar
-        for i, j in self._jogadas_possiveis():
-            if self._teste_jogada_vencedora(i, j, cpu_symbol):
-                return i, j
+        for bit in self._jogadas_possiveis():
+            if self._teste_jogada_vencedora(bit, cpu_symbol):
+                return bit_to_xy(bit)
         # 2. Tenta bloquear
-        for i, j in self._jogadas_possiveis():
-            if self._teste_jogada_vencedora(i, j, player_symbol):
-                return i, j
+        for bit in self._jogadas_possiveis():
+            if self._teste_jogada_vencedora(bit, player_symbol):
+                return bit_to_xy(bit)
         # 3. Ocupa o centro
-        if self.tabuleiro[1][1] == ' ': return (1, 1)
+        if self.casa_vazia(1, 1): return (1, 1)
         # 4. Ocupa um canto
-        cantos = [(0, 0), (0, 2), (2, 0), (2, 2)]
-        random.shuffle(cantos)
-        for i, j in cantos:
-            if self.tabuleiro[i][j] == ' ': return i, j
+        cantos = CANTOS_LIVRES[self.x_mask | self.o_mask]
+        if cantos: return bit_to_xy(random.choice(cantos))
         # 5. Joga aleatoriamente
         return self.jogada_aleatoria()
-    
-    def _jogadas_possiveis(self):
-        return [(i, j) for i in range(3) for j in range(3) if self.tabuleiro[i][j] == ' ']
 
-    def _teste_jogada_vencedora(self, i, j, symbol):
-        tabuleiro_copia = [linha[:] for linha in self.tabuleiro]
-        tabuleiro_copia[i][j] = symbol
-        vencedor, _ = self._avaliar_tabuleiro(tabuleiro_copia)
-        return vencedor == symbol
+    def _jogadas_possiveis(self, x_mask=None, o_mask=None, primeira=None):
+        """
+        Retorna os bits das casas vazias (por padrão, do tabuleiro atual) em MOVE_ORDER.
+        Se `primeira` for dada (uma casa vazia), ela sai antes de todas as outras.
 
-    def _process_minimax_branch(self, tabuleiro, is_maximizing, cpu_symbol, player_symbol, alfa, beta):
-        """Processa um único ramo (maximizando ou minimizando) do algoritmo minimax."""
+        Retorna:
+            tuple: Bits das casas vazias, lidos de JOGADAS_LIVRES.
+        """
+        if x_mask is None:
+            x_mask, o_mask = self.x_mask, self.o_mask
+        ocupadas = x_mask | o_mask
+        if primeira is not None:
+            return (primeira,) + JOGADAS_LIVRES[ocupadas | (1 << primeira)]
+        return JOGADAS_LIVRES[ocupadas]
+
+    def _teste_jogada_vencedora(self, bit, symbol):
+        # Só as linhas de `symbol` que passam pela casa podem ser completadas por ela.
+        return _completa_linha((self.x_mask if symbol == 'X' else self.o_mask) | (1 << bit), bit)
+
+    def _process_minimax_branch(self, x_mask, o_mask, is_maximizing, cpu_symbol, player_symbol, alfa, beta, jogada_tt=None):
+        """
+        Processa um único ramo (maximizando ou minimizando) do algoritmo minimax.
+        A melhor jogada guardada na tabela de transposição, se houver, é explorada primeiro.
+        """
         melhor_jogada = None
         if is_maximizing:
-            melhor_valor = -float('inf')
+            melhor_valor = -INF
             symbol_to_place = cpu_symbol
         else:
-            melhor_valor = float('inf')
+            melhor_valor = INF
             symbol_to_place = player_symbol
 
-        for i, j in self._jogadas_possiveis():
-            tabuleiro[i][j] = symbol_to_place
-            valor, _ = self.minimax_alfa_beta(tabuleiro, not is_maximizing, cpu_symbol, player_symbol, alfa, beta)
-            tabuleiro[i][j] = ' '
+        # Referências locais: evitam buscar o método em `self` a cada filho.
+        minimax = self.minimax_alfa_beta
+        coloca_x = symbol_to_place == 'X'
+        proximo_max = not is_maximizing
+        for bit in self._jogadas_possiveis(x_mask, o_mask, jogada_tt):
+            if coloca_x:
+                valor, _ = minimax(x_mask | (1 << bit), o_mask, proximo_max, cpu_symbol, player_symbol, alfa, beta, bit)
+            else:
+                valor, _ = minimax(x_mask, o_mask | (1 << bit), proximo_max, cpu_symbol, player_symbol, alfa, beta, bit)
 
             if is_maximizing:
                 if valor > melhor_valor:
-                    melhor_valor, melhor_jogada = valor, (i, j)
+                    melhor_valor, melhor_jogada = valor, bit
                 alfa = max(alfa, melhor_valor)
             else: # Minimizing
                 if valor < melhor_valor:
-                    melhor_valor, melhor_jogada = valor, (i, j)
+                    melhor_valor, melhor_jogada = valor, bit
                 beta = min(beta, melhor_valor)
             
             if beta <= alfa:
@@ -180,18 +329,140 @@ class TicTacToeLogic:
         
         return melhor_valor, melhor_jogada
 
-    def minimax_alfa_beta(self, tabuleiro, is_maximizing, cpu_symbol, player_symbol, alfa=-float('inf'), beta=float('inf')):
+    def minimax_alfa_beta(self, x_mask, o_mask, is_maximizing, cpu_symbol, player_symbol, alfa=-INF, beta=INF, ultima=None):
         """
         Algoritmo Minimax com poda Alfa-Beta para encontrar a jogada ótima.
-        Refatorado para menor complexidade cognitiva.
+        Opera diretamente sobre as máscaras de bits, sem copiar o tabuleiro.
+        `ultima` é o bit da jogada que levou a esta posição (None na raiz).
+
+        Retorna:
+            tuple: (int, int) com o valor da posição e o bit da melhor jogada (ou None).
         """
-        vencedor, _ = self._avaliar_tabuleiro(tabuleiro)
+        if ultima is None:
+            vencedor, _ = evaluate(x_mask, o_mask)
+        else:
+            # Só as linhas que passam pela última jogada podem ter acabado de ser completadas.
+            quem_jogou = player_symbol if is_maximizing else cpu_symbol
+            if _completa_linha(x_mask if quem_jogou == 'X' else o_mask, ultima):
+                vencedor = quem_jogou
+            elif (x_mask | o_mask) == FULL_MASK:
+                vencedor = "Empate"
+            else:
+                vencedor = None
         if vencedor:
             if vencedor == cpu_symbol: return 10, None
             if vencedor == player_symbol: return -10, None
             return 0, None # Empate
-        
-        return self._process_minimax_branch(tabuleiro, is_maximizing, cpu_symbol, player_symbol, alfa, beta)
+
+        # Tabela de transposição: a mesma posição pode ser alcançada por ordens diferentes,
+        # e posições simétricas têm o mesmo valor, então a chave é a forma canônica.
+        canon_x, canon_o, simetria = canonical(x_mask, o_mask)
+        chave = (canon_x, canon_o, is_maximizing)
+        alfa_orig = alfa
+        tt = self._tt
+        entrada = tt.get(chave)
+        jogada_tt = None
+        if entrada is not None:
+            valor_tt, jogada_canonica, flag = entrada
+            if jogada_canonica is not None:
+                jogada_tt = SYM_INV[simetria][jogada_canonica]
+            if flag == TT_EXACT:
+                return valor_tt, jogada_tt
+            if flag == TT_LOWER:
+                alfa = max(alfa, valor_tt)
+            else:
+                beta = min(beta, valor_tt)
+            if alfa >= beta:
+                return valor_tt, jogada_tt
+
+        # Explorar primeiro a jogada da TT também garante que, se a busca falhar baixo na
+        # janela apertada pela entrada, a jogada devolvida é a que atinge o limite guardado.
+        valor, jogada = self._process_minimax_branch(x_mask, o_mask, is_maximizing, cpu_symbol, player_symbol, alfa, beta, jogada_tt)
+
+        if valor <= alfa_orig:
+            flag = TT_UPPER
+        elif valor >= beta:
+            flag = TT_LOWER
+        else:
+            flag = TT_EXACT
+        jogada_canonica = SYM_PERMS[simetria][jogada] if jogada is not None else None
+        tt[chave] = (valor, jogada_canonica, flag)
+        return valor, jogada
+
+
+def _build_perfect_play_table():
+    """
+    Enumera todos os estados alcançáveis a partir do tabuleiro vazio e resolve cada um
+    com o minimax, compartilhando a mesma tabela de transposição. Só a forma canônica
+    de cada estado é resolvida, o que reduz a tabela a cerca de um oitavo.
+
+    Retorna:
+        dict: (x_mask, o_mask, lado_a_jogar) canônico -> bit da jogada ótima nesse estado.
+    """
+    logica = TicTacToeLogic()
+    tabela = {}
+    pilha = [(0, 0, 'X')]
+    while pilha:
+        x_mask, o_mask, lado = pilha.pop()
+        x_mask, o_mask, _ = canonical(x_mask, o_mask)
+        estado = (x_mask, o_mask, lado)
+        if estado in tabela or evaluate(x_mask, o_mask)[0]:
+            continue
+        outro = 'O' if lado == 'X' else 'X'
+        # Quem joga é sempre o maximizador na raiz da busca.
+        _, tabela[estado] = logica.minimax_alfa_beta(x_mask, o_mask, True, lado, outro)
+        for bit in logica._jogadas_possiveis(x_mask, o_mask):
+            if lado == 'X':
+                pilha.append((x_mask | (1 << bit), o_mask, 'O'))
+            else:
+                pilha.append((x_mask, o_mask | (1 << bit), 'X'))
+    return tabela
+
+
+def _carregar_perfect_play():
+    """Carrega a tabela de jogo perfeito do disco ou, na falta dela, constrói e salva."""
+    if PERFECT_PLAY:
+        return
+    try:
+        with open(PERFECT_PLAY_PATH, 'rb') as f:
+            formato, tabela = pickle.load(f)
+        if formato == PERFECT_PLAY_FORMATO:
+            PERFECT_PLAY.update(tabela)
+            return
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError, TypeError, ValueError):
+        pass
+    PERFECT_PLAY.update(_build_perfect_play_table())
+    try:
+        with open(PERFECT_PLAY_PATH, 'wb') as f:
+            pickle.dump((PERFECT_PLAY_FORMATO, PERFECT_PLAY), f)
+    except IOError:
+        print("Erro ao salvar a tabela de jogadas.")
+
+
+# Temas usados quando o arquivo de temas não existe ou está inválido.
+# Cor da linha de vitória para temas que não definem "win_line".
+COR_LINHA_VITORIA = "#27ae60"
+
+TEMAS_FALLBACK = {
+    "dark": {"bg": "#1a252f", "grid_bg": "#2c3e50", "cell_bg": "#34495e", "text": "#ecf0f1", "x": "#3498db", "o": "#e74c3c", "btn": "#3498db", "btn_hover": "#2980b9", "win_line": COR_LINHA_VITORIA},
+    "light": {"bg": "#ecf0f1", "grid_bg": "#bdc3c7", "cell_bg": "#ffffff", "text": "#2c3e50", "x": "#2980b9", "o": "#c0392b", "btn": "#2980b9", "btn_hover": "#3498db", "win_line": COR_LINHA_VITORIA}
+}
+
+
+@lru_cache(maxsize=1)
+def _carregar_temas(path):
+    """
+    Lê o arquivo de temas uma única vez por processo; as janelas seguintes reaproveitam
+    o mesmo dicionário (que só é lido, nunca alterado).
+
+    Retorna:
+        dict: nome do tema -> cores, ou TEMAS_FALLBACK se o arquivo não puder ser lido.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return TEMAS_FALLBACK
 
 
 class BoardWidget(QWidget):
@@ -199,6 +470,12 @@ class BoardWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.winning_line_coords = None
+        # Caneta criada uma vez; só muda de cor quando o tema muda.
+        self._win_pen = QPen(QColor(COR_LINHA_VITORIA), 10, Qt.SolidLine, Qt.RoundCap)
+
+    def set_pen_color(self, cor):
+        self._win_pen.setColor(QColor(cor))
+        self.update()
 
     def set_winning_line(self, start_pos, end_pos):
         self.winning_line_coords = (start_pos, end_pos)
@@ -212,56 +489,102 @@ class BoardWidget(QWidget):
         super().paintEvent(event)
         if self.winning_line_coords:
             painter = QPainter(self)
-            pen = QPen(QColor("#27ae60"), 10, Qt.SolidLine, Qt.RoundCap)
-            painter.setPen(pen)
+            painter.setPen(self._win_pen)
             start_pos, end_pos = self.winning_line_coords
             painter.drawLine(start_pos, end_pos)
 
 
+class _SinaisCPU(QObject):
+    """Sinais do _CPUWorker (um QRunnable não pode emitir sinais por conta própria)."""
+    # (partida, bit da jogada); o bit é -1 quando não há jogada possível.
+    jogada_pronta = pyqtSignal(int, int)
+
+
+class _CPUWorker(QRunnable):
+    """
+    Calcula a jogada da CPU numa thread do QThreadPool, para não travar a interface.
+    Trabalha sobre uma cópia das máscaras do tabuleiro, sem tocar na lógica da GUI.
+    """
+    def __init__(self, sinais, partida, x_mask, o_mask, dificuldade, cpu_symbol):
+        super().__init__()
+        self.sinais = sinais
+        self.partida = partida
+        self.x_mask, self.o_mask = x_mask, o_mask
+        self.dificuldade = dificuldade
+        self.cpu_symbol = cpu_symbol
+
+    def run(self):
+        logica = TicTacToeLogic()
+        logica.x_mask, logica.o_mask = self.x_mask, self.o_mask
+        logica.jogador_atual = self.cpu_symbol
+        jogada = logica.estrategia_cpu(self.dificuldade, self.cpu_symbol)
+        self.sinais.jogada_pronta.emit(self.partida, xy_to_bit(*jogada) if jogada else -1)
+
+
 class JogoDaVelhaGUI(QMainWindow):
     """Classe principal da interface gráfica."""
     # --- Melhoria 9: Refatoração do Código (Constantes) ---
     THEME_FILE = "themes.json"
     STATS_FILE = "stats.json"
+    THEME_PATH = MODULE_DIR / THEME_FILE
+    STATS_PATH = MODULE_DIR / STATS_FILE
+    _SYM_DISPLAY = ('', 'X', 'O')  # Texto de cada valor de TicTacToeLogic.celula
 
     def __init__(self):
         super().__init__()
         self.jogo_logica = TicTacToeLogic()
         self.stats_sessao = {'X': 0, 'O': 0, 'Empate': 0}
         self.stats_historico = self.carregar_stats()
+        self._stats_dirty = False
         self.modo_vs_cpu = False
         self.dificuldade_cpu = 'Fácil'
         self.player_symbol = 'X'
         self.carregar_temas()
         self.tema_atual = 'dark'
+        # Fontes compartilhadas entre os widgets (criadas aqui, pois exigem o QApplication).
+        self._FONT_TITLE = QFont('Arial', 32, QFont.Bold)
+        self._FONT_SUB = QFont('Arial', 24, QFont.Bold)
+        self._FONT_BODY = QFont('Arial', 16, QFont.Bold)
+        self._FONT_CELL = QFont('Arial', 36, QFont.Bold)
+        self._FONT_SMALL = QFont('Arial', 14)
+        # Temporizadores reutilizados: jogada da CPU e mensagem de fim de jogo.
+        self._cpu_timer = QTimer(self)
+        self._cpu_timer.setSingleShot(True)
+        self._cpu_timer.timeout.connect(self.jogada_cpu_gui)
+        self._fim_timer = QTimer(self)
+        self._fim_timer.setSingleShot(True)
+        self._fim_timer.timeout.connect(self.mostrar_msg_fim_jogo)
+        self._pending_msg = ''
+        # Jogada da CPU calculada fora da thread da GUI. `_partida` muda a cada reinício,
+        # para descartar resultados que cheguem depois de a partida ter acabado.
+        self._partida = 0
+        self._sinais_cpu = _SinaisCPU(self)
+        self._sinais_cpu.jogada_pronta.connect(self._aplicar_jogada_cpu)
         self.setup_ui()
 
     def carregar_temas(self):
         """Carrega os temas de um arquivo JSON externo."""
-        try:
-            theme_path = Path(__file__).parent / self.THEME_FILE
-            with open(theme_path, 'r', encoding='utf-8') as f:
-                self.themes = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.themes = {
-                "dark": {"bg": "#1a252f", "grid_bg": "#2c3e50", "cell_bg": "#34495e", "text": "#ecf0f1", "x": "#3498db", "o": "#e74c3c", "btn": "#3498db", "btn_hover": "#2980b9"},
-                "light": {"bg": "#ecf0f1", "grid_bg": "#bdc3c7", "cell_bg": "#ffffff", "text": "#2c3e50", "x": "#2980b9", "o": "#c0392b", "btn": "#2980b9", "btn_hover": "#3498db"}
-            }
+        self.themes = _carregar_temas(self.THEME_PATH)
 
     # --- Melhoria 4: Persistência de Histórico ---
     def carregar_stats(self):
         try:
-            stats_path = Path(__file__).parent / self.STATS_FILE
-            with open(stats_path, 'r', encoding='utf-8') as f:
+            with open(self.STATS_PATH, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except (FileNotFoundError, json.JSONDecodeError):
             return {'X': 0, 'O': 0, 'Empate': 0, 'cpu_X': 0, 'cpu_O': 0}
 
     def salvar_stats(self):
+        # Só grava se alguma partida terminou desde o último salvamento. A escrita vai para
+        # um arquivo temporário que substitui o original, para não corromper o histórico.
+        if not self._stats_dirty:
+            return
         try:
-            stats_path = Path(__file__).parent / self.STATS_FILE
-            with open(stats_path, 'w', encoding='utf-8') as f:
+            tmp_path = self.STATS_PATH.with_name(self.STATS_FILE + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 json.dump(self.stats_historico, f, indent=4)
+            os.replace(tmp_path, self.STATS_PATH)
+            self._stats_dirty = False
         except IOError:
             print("Erro ao salvar estatísticas.")
 
@@ -291,11 +614,16 @@ class JogoDaVelhaGUI(QMainWindow):
             QPushButton:hover {{ background-color: {theme['btn_hover']}; }}
             QComboBox, QLineEdit {{ border: 1px solid {theme['btn']}; border-radius: 5px; padding: 10px; font-size: 14px; color: {theme['text']}; background-color: {theme['cell_bg']};}}
         """)
+        # Estilos das casas, montados uma vez por tema em vez de a cada jogada.
+        self._style_empty = f"background-color: {theme['cell_bg']}; border-radius: 8px;"
+        self._style_x = f"color: {theme['x']}; background-color: {theme['grid_bg']}; font-size: 36px; font-weight: bold; border-radius: 8px;"
+        self._style_o = f"color: {theme['o']}; background-color: {theme['grid_bg']}; font-size: 36px; font-weight: bold; border-radius: 8px;"
         if hasattr(self, 'botoes'):
+            self.board_widget.set_pen_color(theme.get('win_line', COR_LINHA_VITORIA))
             for i in range(3):
                 for j in range(3):
-                    if not self.jogo_logica.tabuleiro[i][j].strip():
-                        self.botoes[i][j].setStyleSheet(f"background-color: {theme['cell_bg']}; border-radius: 8px;")
+                    if self.jogo_logica.casa_vazia(i, j):
+                        self.botoes[i][j].setStyleSheet(self._style_empty)
 
     def criar_menu_inicial(self):
         menu_widget = QWidget()
@@ -303,7 +631,7 @@ class JogoDaVelhaGUI(QMainWindow):
         layout.setAlignment(Qt.AlignCenter)
         layout.setSpacing(20)
         title = QLabel("Jogo da Velha")
-        title.setFont(QFont('Arial', 32, QFont.Bold))
+        title.setFont(self._FONT_TITLE)
         title.setAlignment(Qt.AlignCenter)
         btn_vs_cpu = QPushButton('Jogador vs CPU')
         btn_vs_cpu.clicked.connect(lambda: self.stacked_widget.setCurrentIndex(2))
@@ -327,7 +655,7 @@ class JogoDaVelhaGUI(QMainWindow):
         layout.setAlignment(Qt.AlignCenter)
         layout.setSpacing(15)
         title = QLabel("Nomes dos Jogadores")
-        title.setFont(QFont('Arial', 24, QFont.Bold))
+        title.setFont(self._FONT_SUB)
         self.nome_jogador1 = QLineEdit()
         self.nome_jogador1.setPlaceholderText("Nome do Jogador 1 (X)")
         self.nome_jogador2 = QLineEdit()
@@ -349,12 +677,12 @@ class JogoDaVelhaGUI(QMainWindow):
         layout.setAlignment(Qt.AlignCenter)
         layout.setSpacing(20)
         title = QLabel("Selecione a Dificuldade")
-        title.setFont(QFont('Arial', 24, QFont.Bold))
+        title.setFont(self._FONT_SUB)
         self.combo_dificuldade = QComboBox()
         self.combo_dificuldade.addItems([TicTacToeLogic.FACIL, TicTacToeLogic.MEDIO, TicTacToeLogic.IMPOSSIVEL])
         # --- Melhoria 2: Escolha de Símbolo (X/O) ---
         label_simbolo = QLabel("Escolha o seu símbolo:")
-        label_simbolo.setFont(QFont('Arial', 14))
+        label_simbolo.setFont(self._FONT_SMALL)
         self.combo_simbolo = QComboBox()
         self.combo_simbolo.addItems(['X (começa a jogar)', 'O'])
         iniciar_btn = QPushButton('Iniciar Jogo')
@@ -374,10 +702,10 @@ class JogoDaVelhaGUI(QMainWindow):
         self.v_layout = QVBoxLayout(jogo_widget)
         self.v_layout.setContentsMargins(20, 20, 20, 20)
         self.placar_label = QLabel()
-        self.placar_label.setFont(QFont('Arial', 14))
+        self.placar_label.setFont(self._FONT_SMALL)
         self.placar_label.setAlignment(Qt.AlignCenter)
         self.info_label = QLabel()
-        self.info_label.setFont(QFont('Arial', 16, QFont.Bold))
+        self.info_label.setFont(self._FONT_BODY)
         self.info_label.setAlignment(Qt.AlignCenter)
         self.v_layout.addWidget(self.placar_label)
         self.v_layout.addWidget(self.info_label)
@@ -387,13 +715,27 @@ class JogoDaVelhaGUI(QMainWindow):
         self.board_widget = BoardWidget()
         grid_layout.addWidget(self.board_widget, 0, 0, 3, 3)
         self.botoes = [[QPushButton() for _ in range(3)] for _ in range(3)]
+        # As mesmas casas em ordem linear (índice xy_to_bit(i, j)), para percorrê-las de uma vez.
+        self.botoes_flat = [btn for linha in self.botoes for btn in linha]
+        self._button_anims = [None] * 9  # Mesmo índice de botoes_flat
         for i in range(3):
             for j in range(3):
                 btn = self.botoes[i][j]
                 btn.setFixedSize(100, 100)
-                btn.setFont(QFont('Arial', 36, QFont.Bold))
-                btn.clicked.connect(lambda _, x=i, y=j: self.fazer_jogada_gui(x, y))
+                btn.setFont(self._FONT_CELL)
+                # Todas as casas usam o mesmo slot; a posição fica guardada no próprio botão.
+                btn.setProperty('cell', xy_to_bit(i, j))
+                btn.clicked.connect(self._ao_clicar_casa)
                 grid_layout.addWidget(btn, i, j)
+                # --- Melhoria 3: Animação de Fade-In (um efeito e uma animação por casa) ---
+                opacity_effect = QGraphicsOpacityEffect(btn)
+                btn.setGraphicsEffect(opacity_effect)
+                anim = QPropertyAnimation(opacity_effect, b"opacity", btn)
+                anim.setDuration(400)
+                anim.setStartValue(0)
+                anim.setEndValue(1)
+                anim.setEasingCurve(QEasingCurve.InOutQuad)
+                self._button_anims[xy_to_bit(i, j)] = anim
         self.v_layout.addWidget(self.board_container)
         btn_menu = QPushButton("Voltar ao Menu")
         btn_menu.clicked.connect(self.voltar_ao_menu)
@@ -412,7 +754,7 @@ class JogoDaVelhaGUI(QMainWindow):
         self.stacked_widget.setCurrentIndex(3)
         if self.player_symbol == 'O':
             self.ativar_tabuleiro(False)
-            QTimer.singleShot(500, self.jogada_cpu_gui)
+            self._cpu_timer.start(500)
 
     def iniciar_jogo_vs_jogador(self):
         self.modo_vs_cpu = False
@@ -426,6 +768,10 @@ class JogoDaVelhaGUI(QMainWindow):
         self.atualizar_placar()
         self.stacked_widget.setCurrentIndex(0)
 
+    def _ao_clicar_casa(self):
+        casa = self.sender().property('cell')
+        self.fazer_jogada_gui(*bit_to_xy(casa))
+
     def fazer_jogada_gui(self, x, y):
         # --- Melhoria 1: Efeitos Sonoros ---
         QApplication.beep()
@@ -439,12 +785,20 @@ class JogoDaVelhaGUI(QMainWindow):
     def jogada_cpu_gui(self):
         if not self.jogo_logica.vencedor:
             cpu_symbol = 'O' if self.player_symbol == 'X' else 'X'
-            jogada = self.jogo_logica.estrategia_cpu(self.dificuldade_cpu, cpu_symbol)
-            if jogada:
-                self.jogo_logica.fazer_jogada(jogada[0], jogada[1])
-                self.atualizar_botao(jogada[0], jogada[1])
-            self.verificar_estado_jogo()
-            self.ativar_tabuleiro(True)
+            worker = _CPUWorker(self._sinais_cpu, self._partida, self.jogo_logica.x_mask,
+                                self.jogo_logica.o_mask, self.dificuldade_cpu, cpu_symbol)
+            QThreadPool.globalInstance().start(worker)
+
+    def _aplicar_jogada_cpu(self, partida, bit):
+        # Resultado de uma partida que já foi reiniciada: ignora
+        if partida != self._partida or self.jogo_logica.vencedor:
+            return
+        if bit >= 0:
+            x, y = bit_to_xy(bit)
+            self.jogo_logica.fazer_jogada(x, y)
+            self.atualizar_botao(x, y)
+        self.verificar_estado_jogo()
+        self.ativar_tabuleiro(True)
 
     def verificar_estado_jogo(self):
         fim, linha_vencedora = self.jogo_logica.verificar_fim_de_jogo()
@@ -459,7 +813,7 @@ class JogoDaVelhaGUI(QMainWindow):
                 # --- Melhoria 5: Indicador "CPU a Pensar" ---
                 if self.dificuldade_cpu != TicTacToeLogic.FACIL:
                     self.info_label.setText("CPU está a pensar...")
-                QTimer.singleShot(500, self.jogada_cpu_gui)
+                self._cpu_timer.start(500)
 
     def fim_de_jogo(self, linha_vencedora):
         vencedor = self.jogo_logica.vencedor
@@ -476,31 +830,38 @@ class JogoDaVelhaGUI(QMainWindow):
             self.stats_historico[vencedor] += 1
             self.destacar_vitoria(linha_vencedora)
         
+        self._stats_dirty = True
+
         # --- Melhoria 7: Desativar Tabuleiro no Fim ---
         self.ativar_tabuleiro(False)
         self.atualizar_placar()
-        QTimer.singleShot(1500, lambda: self.mostrar_msg_fim_jogo(msg))
+        self._pending_msg = msg
+        self._fim_timer.start(1500)
 
-    def mostrar_msg_fim_jogo(self, msg):
-        QMessageBox.information(self, 'Fim de Jogo', msg)
+    def mostrar_msg_fim_jogo(self):
+        QMessageBox.information(self, 'Fim de Jogo', self._pending_msg)
         self.reiniciar_jogo()
 
     def reiniciar_jogo(self):
+        # Descarta jogadas da CPU e mensagens agendadas para a partida anterior
+        self._cpu_timer.stop()
+        self._fim_timer.stop()
+        self._partida += 1
         self.jogo_logica.reset_board()
         self.board_widget.clear_line()
-        theme = self.themes[self.tema_atual]
-        for i in range(3):
-            for j in range(3):
-                self.botoes[i][j].setText('')
-                self.botoes[i][j].setStyleSheet(f"background-color: {theme['cell_bg']}; border-radius: 8px;")
-                self.botoes[i][j].setGraphicsEffect(None) # Limpa efeito de opacidade
+        for btn, anim in zip(self.botoes_flat, self._button_anims):
+            btn.setText('')
+            btn.setStyleSheet(self._style_empty)
+            # Interrompe um fade-in em andamento e deixa a casa totalmente opaca
+            anim.stop()
+            anim.targetObject().setOpacity(1)
         self.ativar_tabuleiro(True)
         self.atualizar_info_label()
         
         # Se CPU começa (jogador escolheu 'O')
         if self.modo_vs_cpu and self.player_symbol == 'O':
             self.ativar_tabuleiro(False)
-            QTimer.singleShot(500, self.jogada_cpu_gui)
+            self._cpu_timer.start(500)
 
     def reiniciar_jogo_completo(self):
         self.stats_sessao = {'X': 0, 'O': 0, 'Empate': 0}
@@ -508,22 +869,15 @@ class JogoDaVelhaGUI(QMainWindow):
         self.reiniciar_jogo()
     
     def atualizar_botao(self, x, y):
-        jogador = self.jogo_logica.tabuleiro[x][y]
+        celula = self.jogo_logica.celula(x, y)
         btn = self.botoes[x][y]
-        btn.setText(jogador)
-        theme = self.themes[self.tema_atual]
-        cor_jogador = theme['x'] if jogador == 'X' else theme['o']
-        btn.setStyleSheet(f"color: {cor_jogador}; background-color: {theme['grid_bg']}; font-size: 36px; font-weight: bold; border-radius: 8px;")
+        btn.setText(self._SYM_DISPLAY[celula])
+        btn.setStyleSheet(self._style_x if celula == 1 else self._style_o)
         
         # --- Melhoria 3: Animação de Fade-In ---
-        opacity_effect = QGraphicsOpacityEffect(btn)
-        btn.setGraphicsEffect(opacity_effect)
-        self.opacity_anim = QPropertyAnimation(opacity_effect, b"opacity")
-        self.opacity_anim.setDuration(400)
-        self.opacity_anim.setStartValue(0)
-        self.opacity_anim.setEndValue(1)
-        self.opacity_anim.setEasingCurve(QEasingCurve.InOutQuad)
-        self.opacity_anim.start()
+        anim = self._button_anims[xy_to_bit(x, y)]
+        anim.stop()
+        anim.start()
 
     def destacar_vitoria(self, linha):
         start_cell = self.botoes[linha[0][0]][linha[0][1]]
@@ -546,9 +900,8 @@ class JogoDaVelhaGUI(QMainWindow):
             self.info_label.setText(f"Vez de: {nome_jogador} ({self.jogo_logica.jogador_atual})")
     
     def ativar_tabuleiro(self, enabled):
-        for i in range(3):
-            for j in range(3):
-                self.botoes[i][j].setEnabled(enabled)
+        for btn in self.botoes_flat:
+            btn.setEnabled(enabled)
 
     # --- Melhoria 8: Atalhos de Teclado ---
     def keyPressEvent(self, event):
@@ -561,14 +914,17 @@ class JogoDaVelhaGUI(QMainWindow):
 
 
 if __name__ == '__main__':
-    theme_path = Path(__file__).parent / JogoDaVelhaGUI.THEME_FILE
+    # Carrega (ou constrói) a tabela de jogo perfeito antes de abrir a janela, para que
+    # nenhuma jogada da CPU espere por ela.
+    _carregar_perfect_play()
+    theme_path = JogoDaVelhaGUI.THEME_PATH
     if not theme_path.exists():
         # --- Melhoria 6: Novos Temas Visuais ---
         default_themes = {
-            "dark": {"bg": "#1a252f", "grid_bg": "#2c3e50", "cell_bg": "#34495e", "text": "#ecf0f1", "x": "#3498db", "o": "#e74c3c", "btn": "#3498db", "btn_hover": "#2980b9"},
-            "light": {"bg": "#ecf0f1", "grid_bg": "#bdc3c7", "cell_bg": "#ffffff", "text": "#2c3e50", "x": "#2980b9", "o": "#c0392b", "btn": "#2980b9", "btn_hover": "#3498db"},
-            "retro": {"bg": "#202020", "grid_bg": "#101010", "cell_bg": "#303030", "text": "#00ff00", "x": "#00ff00", "o": "#ff00ff", "btn": "#505050", "btn_hover": "#707070"},
-            "floresta": {"bg": "#e8f5e9", "grid_bg": "#a5d6a7", "cell_bg": "#c8e6c9", "text": "#1b5e20", "x": "#2e7d32", "o": "#d84315", "btn": "#4caf50", "btn_hover": "#66bb6a"}
+            "dark": {"bg": "#1a252f", "grid_bg": "#2c3e50", "cell_bg": "#34495e", "text": "#ecf0f1", "x": "#3498db", "o": "#e74c3c", "btn": "#3498db", "btn_hover": "#2980b9", "win_line": COR_LINHA_VITORIA},
+            "light": {"bg": "#ecf0f1", "grid_bg": "#bdc3c7", "cell_bg": "#ffffff", "text": "#2c3e50", "x": "#2980b9", "o": "#c0392b", "btn": "#2980b9", "btn_hover": "#3498db", "win_line": COR_LINHA_VITORIA},
+            "retro": {"bg": "#202020", "grid_bg": "#101010", "cell_bg": "#303030", "text": "#00ff00", "x": "#00ff00", "o": "#ff00ff", "btn": "#505050", "btn_hover": "#707070", "win_line": COR_LINHA_VITORIA},
+            "floresta": {"bg": "#e8f5e9", "grid_bg": "#a5d6a7", "cell_bg": "#c8e6c9", "text": "#1b5e20", "x": "#2e7d32", "o": "#d84315", "btn": "#4caf50", "btn_hover": "#66bb6a", "win_line": COR_LINHA_VITORIA}
         }
         with open(theme_path, 'w', encoding='utf-8') as f:
             json.dump(default_themes, f, indent=4)
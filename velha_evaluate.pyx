@@ -0,0 +1,31 @@
+# cython: language_level=3
+"""
+Versão compilada de `evaluate` do Jogo da Velha.
+
+Compile uma vez com `cythonize -i velha_evaluate.pyx` (ver README); Jogo_da_Velha.py
+importa a extensão gerada quando ela existe e, sem ela, usa a implementação em Python
+puro, com o mesmo resultado.
+"""
+
+cdef unsigned int WINS[8]
+WINS[:] = [0x1C0, 0x038, 0x007, 0x124, 0x092, 0x049, 0x111, 0x054]
+
+
+def evaluate(unsigned int x_mask, unsigned int o_mask):
+    """
+    Avalia um estado do tabuleiro representado por duas máscaras de bits.
+
+    Retorna:
+        tuple: (str, int) com o vencedor/empate e a máscara da linha da vitória, ou (None, 0).
+    """
+    cdef int i
+    cdef unsigned int w
+    for i in range(8):
+        w = WINS[i]
+        if (x_mask & w) == w:
+            return 'X', w
+        if (o_mask & w) == w:
+            return 'O', w
+    if (x_mask | o_mask) == 0x1FF:
+        return "Empate", 0
+    return None, 0